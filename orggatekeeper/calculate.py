@@ -3,62 +3,103 @@
 # SPDX-License-Identifier: MPL-2.0
 """Update logic."""
 import datetime
-import re
+from time import monotonic
+from typing import Any
+from typing import Iterable
 from uuid import UUID
 
 import structlog
-from gql import gql
-from more_itertools import one
 from raclients.graph.client import PersistentGraphQLClient
 from raclients.modelclient.mo import ModelClient
 from ramodels.mo import Validity
 from ramodels.mo._shared import OrgUnitHierarchy
 
 from .config import Settings
-from .mo import fetch_org_unit
 from .mo import get_class_uuid
+from .mo import OrgUnitLoader
+from .mo import parse_org_unit
 
 logger = structlog.get_logger()
-ny_regex = re.compile(r"NY\d-niveau")
 
 
-async def is_line_management(gql_client: PersistentGraphQLClient, uuid: UUID) -> bool:
-    """Determine whether the organisation unit is part of line management.
+class HideCache:
+    """Time-limited cache of hide decisions, keyed by organisation unit UUID.
+
+    Organisation units below the same ancestors share the decision for those
+    ancestors, so walking up the tree can stop at the first cached ancestor.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        """Create an empty cache.
+
+        Args:
+            ttl: Number of seconds to keep each decision for.
+        """
+        self.ttl = ttl
+        self._decisions: dict[UUID, tuple[float, bool]] = {}
+
+    def get(self, uuid: UUID) -> bool | None:
+        """Get the cached decision for an organisation unit.
+
+        Args:
+            uuid: UUID of the organisation unit.
+
+        Returns:
+            Whether the organisation unit should be hidden, or None if unknown.
+        """
+        entry = self._decisions.get(uuid)
+        if entry is None:
+            return None
+        expiry, hide = entry
+        if expiry <= monotonic():
+            del self._decisions[uuid]
+            return None
+        return hide
+
+    def set(self, uuids: Iterable[UUID], hide: bool) -> None:
+        """Cache the same decision for a number of organisation units.
+
+        Args:
+            uuids: UUIDs of the organisation units.
+            hide: Whether the organisation units should be hidden.
+        """
+        expiry = monotonic() + self.ttl
+        for uuid in uuids:
+            self._decisions[uuid] = (expiry, hide)
+
+
+def is_ny_niveau(unit_level_user_key: str) -> bool:
+    """Determine whether the unit-level user-key is on the form NY{x}-niveau.
+
+    Equivalent to fullmatching the regex `NY\\d-niveau`, without the regex engine.
 
     Args:
-        gql_client: The GraphQL client to run our queries on.
-        uuid: UUID of the organisation unit.
+        unit_level_user_key: User-key of the organisation unit level.
 
     Returns:
-        Whether the organisation unit should be part of line management.
+        Whether the user-key is NY{x}-niveau for a single digit x.
     """
-    query = gql(
-        """
-        query OrgUnitQuery($uuids: [UUID!]) {
-            org_units(uuids: $uuids) {
-                objects {
-                    org_unit_level {
-                        user_key
-                    }
-                    engagements {
-                        uuid
-                    }
-                    associations {
-                        uuid
-                    }
-                }
-            }
-        }
-        """
+    return (
+        len(unit_level_user_key) == 10
+        and unit_level_user_key.startswith("NY")
+        and unit_level_user_key[2:3].isdecimal()
+        and unit_level_user_key.endswith("-niveau")
     )
-    result = await gql_client.execute(query, {"uuids": [str(uuid)]})
-    obj = one(one(result["org_units"])["objects"])
-    logger.debug("GraphQL obj", obj=obj)
 
+
+def is_line_management(obj: dict[str, Any]) -> bool:
+    """Determine whether the organisation unit is part of line management.
+
+    Args:
+        obj: The GraphQL organisation unit object, as from `fetch_org_unit_full`.
+
+    Returns:
+        Whether the organisation unit should be part of line management.
+    """
     unit_level_user_key = obj["org_unit_level"]["user_key"]
 
-    # Part of line management if userkey matches regex
-    if ny_regex.fullmatch(unit_level_user_key) is not None:
+    # Part of line management if userkey is NY{x}-niveau
+    if is_ny_niveau(unit_level_user_key):
         return True
     # Or if it is "Afdelings-niveau" and it has people attached
     if unit_level_user_key == "Afdelings-niveau":
@@ -71,14 +112,22 @@ async def is_line_management(gql_client: PersistentGraphQLClient, uuid: UUID) ->
 
 
 async def should_hide(
-    gql_client: PersistentGraphQLClient, uuid: UUID, hidden: list[str]
+    org_unit_loader: OrgUnitLoader,
+    obj: dict[str, Any],
+    hidden: frozenset[str],
+    hide_cache: HideCache | None = None,
 ) -> bool:
     """Determine whether the organisation unit should be hidden.
 
+    Walks up the parent chain one level at a time, stopping at the first hidden
+    user-key, the first ancestor with a cached decision, or the root.
+
     Args:
-        gql_client: The GraphQL client to run our queries on.
-        org_unit: The organisation unit object.
+        org_unit_loader: Loader to fetch parents with.
+        obj: The GraphQL organisation unit object, with uuid, user_key and
+            parent_uuid.
         hidden: User-keys of organisation units to hide (all children included).
+        hide_cache: Cache of decisions to reuse and extend, if any.
 
     Returns:
         Whether the organisation unit should be hidden.
@@ -90,35 +139,32 @@ async def should_hide(
         logger.debug("should_hide called with empty hidden list")
         return False
 
-    query = gql(
-        """
-        query ParentQuery($uuids: [UUID!]) {
-            org_units(uuids: $uuids) {
-                objects {
-                    user_key
-                    parent_uuid
-                }
-            }
-        }
-        """
-    )
-    result = await gql_client.execute(query, {"uuids": [str(uuid)]})
-    obj = one(one(result["org_units"])["objects"])
-    logger.debug("GraphQL obj", obj=obj)
-
-    if obj["user_key"] in hidden:
-        return True
-    if obj["parent_uuid"] is not None:
-        return await should_hide(gql_client, obj["parent_uuid"], hidden)
-    return False
-
-
-async def update_line_management(
+    # Every unit visited shares the decision of the topmost one
+    visited = [UUID(obj["uuid"])]
+    hide = obj["user_key"] in hidden
+    while not hide and obj["parent_uuid"] is not None:
+        parent_uuid = UUID(obj["parent_uuid"])
+        cached = hide_cache.get(parent_uuid) if hide_cache is not None else None
+        if cached is not None:
+            hide = cached
+            break
+        obj = await org_unit_loader.load_parent(parent_uuid)
+        visited.append(parent_uuid)
+        hide = obj["user_key"] in hidden
+
+    if hide_cache is not None:
+        hide_cache.set(visited, hide)
+    return hide
+
+
+async def update_line_management(  # pylint: disable=too-many-arguments
     gql_client: PersistentGraphQLClient,
     model_client: ModelClient,
     settings: Settings,
     org_uuid: UUID,
+    org_unit_loader: OrgUnitLoader,
     uuid: UUID,
+    hide_cache: HideCache | None = None,
 ) -> bool:
     """Update line management information for the provided organisation unit.
 
@@ -134,38 +180,48 @@ async def update_line_management(
         model_client: The MO Model client to modify MO with.
         settings: The integration settings module.
         org_uuid: The UUID of the LoRa organisation
+        org_unit_loader: Loader to batch fetching with.
         uuid: UUID of the organisation unit to recalculate.
+        hide_cache: Cache of hide decisions to share between calls, if any.
 
     Returns:
         Whether an update was made.
     """
+    # Fetch the current object along with what is needed to classify it
+    obj = await org_unit_loader.load(uuid)
+
     # Determine the desired org_unit_hierarchy class uuid
-    new_org_unit_hierarchy: OrgUnitHierarchy | None = None
+    new_org_unit_hierarchy_uuid: UUID | None = None
     if settings.enable_hide_logic and await should_hide(
-        gql_client, uuid, settings.hidden
+        org_unit_loader, obj, settings.hidden, hide_cache
     ):
         logger.debug("Organisation Unit needs to be hidden", uuid=uuid)
-        hidden_uuid = await get_class_uuid(
+        new_org_unit_hierarchy_uuid = await get_class_uuid(
             gql_client,
             settings.hidden_uuid,
             settings.hidden_user_key,
         )
-        new_org_unit_hierarchy = OrgUnitHierarchy(uuid=hidden_uuid)
-    elif await is_line_management(gql_client, uuid):
+    elif is_line_management(obj):
         logger.debug("Organisation Unit needs to be in line management", uuid=uuid)
-        line_management_uuid = await get_class_uuid(
+        new_org_unit_hierarchy_uuid = await get_class_uuid(
             gql_client,
             settings.line_management_uuid,
             settings.line_management_user_key,
         )
-        new_org_unit_hierarchy = OrgUnitHierarchy(uuid=line_management_uuid)
 
-    # Fetch the current object and see if we need to update it
-    org_unit = await fetch_org_unit(gql_client, uuid)
-    if org_unit.org_unit_hierarchy == new_org_unit_hierarchy:
+    # See if we need to update the current object, before building it
+    org_unit_hierarchy_uuid = obj["org_unit_hierarchy_uuid"]
+    if org_unit_hierarchy_uuid is not None:
+        org_unit_hierarchy_uuid = UUID(org_unit_hierarchy_uuid)
+    if org_unit_hierarchy_uuid == new_org_unit_hierarchy_uuid:
         logger.debug("Not updating org_unit_hierarchy, already good", uuid=uuid)
         return False
 
+    org_unit = parse_org_unit(obj)
+    new_org_unit_hierarchy: OrgUnitHierarchy | None = None
+    if new_org_unit_hierarchy_uuid is not None:
+        new_org_unit_hierarchy = OrgUnitHierarchy(uuid=new_org_unit_hierarchy_uuid)
+
     # Prepare the updated object for writing
     # TODO: we will have a problem, if new_org_unit_hierarchy is None
     org_unit = org_unit.copy(
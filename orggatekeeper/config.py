@@ -55,10 +55,17 @@ class Settings(BaseSettings):
     auth_realm: str = Field("mo", description="Realm to authenticate against")
 
     enable_hide_logic = Field(True, description="Whether or not to enable hide logic.")
-    hidden: list[str] = Field(
-        [],
+    hidden: frozenset[str] = Field(
+        frozenset(),
         description="List of organisation-unit user-keys to hide (childrens included).",
     )
+    hide_cache_ttl: float = Field(
+        300,
+        description=(
+            "Number of seconds to remember whether an organisation unit is hidden,"
+            " when walking up the organisation tree."
+        ),
+    )
     hidden_uuid: UUID | None = Field(
         None,
         description=(
@@ -102,6 +109,10 @@ class Settings(BaseSettings):
     expose_metrics: bool = Field(True, description="Whether to expose metrics.")
 
     graphql_timeout: int = 120
+    org_unit_batch_size: int = Field(
+        10,
+        description="Maximum number of organisation units to fetch in a single query.",
+    )
 
 
 @cache
@@ -2,13 +2,19 @@
 #
 # SPDX-License-Identifier: MPL-2.0
 """Event handling."""
+from asyncio import create_task
+from asyncio import current_task
 from asyncio import gather
 from asyncio import Semaphore
+from asyncio import shield
+from asyncio import Task
+from asyncio import wait
 from functools import partial
 from operator import itemgetter
 from typing import Any
 from typing import Awaitable
 from typing import Callable
+from typing import cast
 from typing import Tuple
 from typing import TypeVar
 from uuid import UUID
@@ -33,10 +39,13 @@ from ramqp.moqp import MOAMQPSystem
 from starlette.status import HTTP_204_NO_CONTENT
 from starlette.status import HTTP_503_SERVICE_UNAVAILABLE
 
+from .calculate import HideCache
 from .calculate import update_line_management
 from .config import get_settings
 from .config import Settings
 from .mo import fetch_org_uuid
+from .mo import get_class_uuid
+from .mo import OrgUnitLoader
 
 logger = structlog.get_logger()
 T = TypeVar("T")
@@ -49,6 +58,17 @@ update_counter = Counter(
 )
 build_information = Info("build_information", "Build information")
 
+HEALTHCHECK_QUERY = gql(
+    """
+    query HealthcheckQuery {
+        org {
+            uuid
+        }
+    }
+    """
+)
+ORG_UNIT_UUID_QUERY = gql("query OrgUnitUUIDQuery { org_units { uuid } }")
+
 
 def update_build_information(version: str, build_hash: str) -> None:
     """Update build information.
@@ -77,17 +97,8 @@ async def healthcheck_gql(gql_client: PersistentGraphQLClient) -> bool:
     Returns:
         Whether the client is healthy or not.
     """
-    query = gql(
-        """
-        query HealthcheckQuery {
-            org {
-                uuid
-            }
-        }
-        """
-    )
     try:
-        result = await gql_client.execute(query)
+        result = await gql_client.execute(HEALTHCHECK_QUERY)
         if result["org"]["uuid"]:
             return True
     except Exception:  # pylint: disable=broad-except
@@ -172,6 +183,36 @@ def construct_clients(
     return gql_client, model_client
 
 
+async def seed_class_uuids(
+    gql_client: PersistentGraphQLClient, settings: Settings
+) -> Settings:
+    """Resolve the org_unit_hierarchy class UUIDs not provided in settings.
+
+    The hidden class is only resolved if organisation units can be hidden.
+
+    Args:
+        gql_client: The GraphQL client to run our queries on.
+        settings: Integration settings module.
+
+    Returns:
+        Copy of settings with line_management_uuid (and hidden_uuid) set.
+    """
+    update = {
+        "line_management_uuid": await get_class_uuid(
+            gql_client,
+            settings.line_management_uuid,
+            settings.line_management_user_key,
+        )
+    }
+    if settings.enable_hide_logic and settings.hidden:
+        update["hidden_uuid"] = await get_class_uuid(
+            gql_client,
+            settings.hidden_uuid,
+            settings.hidden_user_key,
+        )
+    return settings.copy(update=update)
+
+
 def configure_logging(settings: Settings) -> None:
     """Setup our logging.
 
@@ -205,6 +246,49 @@ async def gather_with_concurrency(parallel: int, *tasks: Awaitable[T]) -> list[T
     return await gather(*map(semaphore_task, tasks))
 
 
+def deduplicate_concurrent(
+    func: Callable[[UUID], Awaitable[T]]
+) -> Callable[[UUID], Awaitable[T]]:
+    """Deduplicate concurrent calls with the same UUID.
+
+    Callers join a call which has yet to start, while a call made during a
+    running call queues exactly one follow-up run, so no change is missed.
+
+    Args:
+        func: The seeded function to deduplicate calls to.
+
+    Returns:
+        The deduplicated function.
+    """
+    queued: dict[UUID, Task[T]] = {}
+    running: dict[UUID, Task[T]] = {}
+
+    async def run_after(previous: Task[T] | None, uuid: UUID) -> T:
+        if previous is not None:
+            await wait([previous])
+
+        # From here on we may read stale data, so new callers must queue a new task
+        current = cast(Task[T], current_task())
+        if queued.get(uuid) is current:
+            del queued[uuid]
+        running[uuid] = current
+        try:
+            return await func(uuid)
+        finally:
+            if running.get(uuid) is current:
+                del running[uuid]
+
+    async def deduplicated(uuid: UUID) -> T:
+        task = queued.get(uuid)
+        if task is None or task.done():
+            task = create_task(run_after(running.get(uuid), uuid))
+            queued[uuid] = task
+        # Shield the shared task from cancellation of any one of its callers
+        return await shield(task)
+
+    return deduplicated
+
+
 def construct_context() -> dict[str, Any]:
     """Construct request context."""
     return {}
@@ -244,9 +328,23 @@ def create_app(  # pylint: disable=too-many-statements
         # Get organisation UUID
         org_uuid = await fetch_org_uuid(gql_client)
 
+        # Resolve class UUIDs once, instead of on every update
+        logger.info("Seeding org_unit_hierarchy class UUIDs")
+        seeded_settings = await seed_class_uuids(gql_client, settings)
+
         logger.info("Seeding line management function")
-        seeded_update_line_management = partial(
-            update_line_management, gql_client, model_client, settings, org_uuid
+        org_unit_loader = OrgUnitLoader(gql_client, settings.org_unit_batch_size)
+        hide_cache = HideCache(settings.hide_cache_ttl)
+        seeded_update_line_management = deduplicate_concurrent(
+            partial(
+                update_line_management,
+                gql_client,
+                model_client,
+                seeded_settings,
+                org_uuid,
+                org_unit_loader,
+                hide_cache=hide_cache,
+            )
         )
         context["seeded_update_line_management"] = seeded_update_line_management
 
@@ -291,8 +389,7 @@ def create_app(  # pylint: disable=too-many-statements
     async def update_all_org_units() -> dict[str, str]:
         """Call update_line_management on all org units."""
         gql_client = context["gql_client"]
-        query = gql("query OrgUnitUUIDQuery { org_units { uuid } }")
-        result = await gql_client.execute(query)
+        result = await gql_client.execute(ORG_UNIT_UUID_QUERY)
         org_unit_uuids = map(UUID, map(itemgetter("uuid"), result["org_units"]))
         org_unit_tasks = map(context["seeded_update_line_management"], org_unit_uuids)
         await gather_with_concurrency(5, *org_unit_tasks)
@@ -2,6 +2,12 @@
 #
 # SPDX-License-Identifier: MPL-2.0
 """Module for fetching information (e.g. facet and class UUIDs) from MO"""
+import asyncio
+from functools import partial
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Iterable
 from typing import Optional
 from uuid import UUID
 
@@ -13,6 +19,96 @@ from ramodels.mo import OrganisationUnit
 
 logger = structlog.get_logger()
 
+CLASS_QUERY = gql(
+    """
+    query ClassQuery($user_keys: [String!]) {
+        classes(user_keys: $user_keys) {
+            uuid
+        }
+    }
+    """
+)
+
+ORGANISATION_UUID_QUERY = gql(
+    """
+    query OrganisationUuidQuery {
+        org {
+            uuid
+        }
+    }
+    """
+)
+
+ORG_UNIT_FULL_QUERY = gql(
+    """
+    query OrgUnitFullQuery($uuids: [UUID!]) {
+        org_units(uuids: $uuids) {
+            objects {
+                uuid
+                user_key
+                validity {
+                    from
+                    to
+                }
+                name
+                parent_uuid
+                org_unit_hierarchy_uuid: org_unit_hierarchy
+                org_unit_type_uuid: unit_type_uuid
+                org_unit_level_uuid
+                org_unit_level {
+                    user_key
+                }
+                engagements {
+                    uuid
+                }
+                associations {
+                    uuid
+                }
+            }
+        }
+    }
+    """
+)
+
+PARENT_QUERY = gql(
+    """
+    query ParentQuery($uuids: [UUID!]) {
+        org_units(uuids: $uuids) {
+            objects {
+                uuid
+                user_key
+                parent_uuid
+            }
+        }
+    }
+    """
+)
+
+
+def _objs_by_uuid(result: dict[str, Any]) -> dict[UUID, dict[str, Any]]:
+    """Extract the organisation unit objects from an org_units query result.
+
+    Units without exactly one object are logged and left out, so that one bad unit
+    does not fail everything else fetched with it.
+
+    Args:
+        result: The GraphQL query result.
+
+    Returns:
+        The GraphQL organisation unit objects by UUID.
+    """
+    objs = {}
+    for org_unit in result["org_units"]:
+        objects = org_unit["objects"]
+        if len(objects) != 1:
+            logger.warning(
+                "Expected exactly one organisation unit object", objects=objects
+            )
+            continue
+        obj = objects[0]
+        objs[UUID(obj["uuid"])] = obj
+    return objs
+
 
 async def fetch_class_uuid(
     gql_client: PersistentGraphQLClient,
@@ -27,17 +123,7 @@ async def fetch_class_uuid(
     Returns:
         The UUID of class.
     """
-
-    query = gql(
-        """
-        query ClassQuery($user_keys: [String!]) {
-            classes(user_keys: $user_keys) {
-                uuid
-            }
-        }
-        """
-    )
-    result = await gql_client.execute(query, {"user_keys": [class_user_key]})
+    result = await gql_client.execute(CLASS_QUERY, {"user_keys": [class_user_key]})
     class_uuid = one(result["classes"])["uuid"]
     return UUID(class_uuid)
 
@@ -52,56 +138,19 @@ async def fetch_org_uuid(gql_client: PersistentGraphQLClient) -> UUID:
     Returns:
         The UUID of the LoRa organisation.
     """
-    query = gql(
-        """
-        query OrganisationUuidQuery {
-            org {
-                uuid
-            }
-        }
-        """
-    )
-    result = await gql_client.execute(query)
+    result = await gql_client.execute(ORGANISATION_UUID_QUERY)
     return UUID(result["org"]["uuid"])
 
 
-async def fetch_org_unit(
-    gql_client: PersistentGraphQLClient, uuid: UUID
-) -> OrganisationUnit:
-    """Fetch an organisation unit from MO using GraphQL.
+def parse_org_unit(obj: dict[str, Any]) -> OrganisationUnit:
+    """Construct an organisation unit from a GraphQL organisation unit object.
 
     Args:
-        gql_client: The GraphQL client to run our queries on.
-        uuid: UUID of the organisation unit to fetch.
+        obj: The GraphQL object, as returned by `fetch_org_unit_full`.
 
     Returns:
         The organisation unit object.
     """
-    query = gql(
-        """
-        query OrgUnitQuery($uuids: [UUID!]) {
-            org_units(uuids: $uuids) {
-                objects {
-                    uuid
-                    user_key
-                    validity {
-                        from
-                        to
-                    }
-                    name
-                    parent_uuid
-                    org_unit_hierarchy_uuid: org_unit_hierarchy
-                    org_unit_type_uuid: unit_type_uuid
-                    org_unit_level_uuid
-                }
-            }
-        }
-        """
-    )
-    logger.debug("Fetching org-unit via GraphQL", uuid=uuid)
-    result = await gql_client.execute(query, {"uuids": [str(uuid)]})
-    obj = one(one(result["org_units"])["objects"])
-    logger.debug("GraphQL obj", obj=obj)
     org_unit = OrganisationUnit.from_simplified_fields(
         uuid=obj["uuid"],
         user_key=obj["user_key"],
@@ -117,6 +166,191 @@ async def fetch_org_unit(
     return org_unit
 
 
+async def fetch_org_units_full(
+    gql_client: PersistentGraphQLClient, uuids: Iterable[UUID]
+) -> dict[UUID, dict[str, Any]]:
+    """Fetch everything required to recalculate a number of organisation units.
+
+    Combines the fields required by `parse_org_unit`, `should_hide` and
+    `is_line_management` into a single GraphQL query.
+
+    Args:
+        gql_client: The GraphQL client to run our queries on.
+        uuids: UUIDs of the organisation units to fetch.
+
+    Returns:
+        The GraphQL organisation unit objects by UUID. Units which are missing, or
+        do not have exactly one object, are left out.
+    """
+    uuids = list(uuids)
+    logger.debug("Fetching full org-units via GraphQL", uuids=uuids)
+    result = await gql_client.execute(
+        ORG_UNIT_FULL_QUERY, {"uuids": [str(uuid) for uuid in uuids]}
+    )
+    objs = _objs_by_uuid(result)
+    logger.debug("GraphQL objs", objs=objs)
+    return objs
+
+
+async def fetch_parents(
+    gql_client: PersistentGraphQLClient, uuids: Iterable[UUID]
+) -> dict[UUID, dict[str, Any]]:
+    """Fetch the user-key and parent of a number of organisation units.
+
+    Used to walk up the organisation tree one level at a time, fetching every
+    unit on a level with a single query.
+
+    Args:
+        gql_client: The GraphQL client to run our queries on.
+        uuids: UUIDs of the organisation units to fetch.
+
+    Returns:
+        Mapping from UUID to GraphQL object with user_key and parent_uuid. Units
+        which are missing, or do not have exactly one object, are left out.
+    """
+    result = await gql_client.execute(
+        PARENT_QUERY, {"uuids": [str(uuid) for uuid in uuids]}
+    )
+    objs = _objs_by_uuid(result)
+    logger.debug("GraphQL objs", objs=objs)
+    return objs
+
+
+class _BatchLoader:
+    """Batch loading of organisation units by UUID.
+
+    A load with nothing else going on is fetched as soon as the event loop gets to
+    it, together with any loads made in the same iteration. Loads made while a
+    fetch is running are collected and fetched together once it is done, or as
+    soon as `max_batch_size` of them are pending.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(
+        self,
+        fetch: Callable[[list[UUID]], Awaitable[dict[UUID, dict[str, Any]]]],
+        max_batch_size: int,
+    ) -> None:
+        """Construct the loader.
+
+        Args:
+            fetch: Function fetching organisation units by UUID with one query.
+            max_batch_size: Number of pending loads which triggers fetching.
+        """
+        self.fetch = fetch
+        self.max_batch_size = max_batch_size
+
+        self._pending: dict[UUID, asyncio.Future[dict[str, Any]]] = {}
+        self._handle: asyncio.Handle | None = None
+        self._fetching = 0
+        # Keep references to running fetches, so they are not garbage collected
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def load(self, uuid: UUID) -> dict[str, Any]:
+        """Load an organisation unit as part of the next batch.
+
+        Args:
+            uuid: UUID of the organisation unit to fetch.
+
+        Returns:
+            The GraphQL organisation unit object.
+        """
+        loop = asyncio.get_running_loop()
+        future = self._pending.get(uuid)
+        if future is None:
+            future = loop.create_future()
+            self._pending[uuid] = future
+            if len(self._pending) >= self.max_batch_size:
+                self._dispatch()
+            elif self._handle is None and not self._fetching:
+                self._handle = loop.call_soon(self._dispatch)
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        """Start fetching the pending batch."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        batch, self._pending = self._pending, {}
+        self._fetching += 1
+        task = asyncio.create_task(self._fetch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, batch: dict[UUID, asyncio.Future[dict[str, Any]]]) -> None:
+        """Fetch a batch and resolve the futures waiting for it.
+
+        Args:
+            batch: Futures to resolve by UUID.
+        """
+        try:
+            objs = await self.fetch(list(batch))
+        except Exception as error:  # pylint: disable=broad-except
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(error)
+        else:
+            for uuid, future in batch.items():
+                if future.done():
+                    continue
+                if uuid in objs:
+                    future.set_result(objs[uuid])
+                else:
+                    future.set_exception(
+                        ValueError(f"Organisation unit not found: {uuid}")
+                    )
+        finally:
+            self._fetching -= 1
+            # Fetch the loads which arrived while we were busy
+            if self._pending and not self._fetching:
+                self._dispatch()
+
+
+class OrgUnitLoader:
+    """Batch loading of organisation units across concurrent recalculations.
+
+    Organisation units are loaded as by `fetch_org_units_full`, and the parents
+    walked by `should_hide` as by `fetch_parents`.
+    """
+
+    def __init__(
+        self, gql_client: PersistentGraphQLClient, max_batch_size: int
+    ) -> None:
+        """Construct the loader.
+
+        Args:
+            gql_client: The GraphQL client to run our queries on.
+            max_batch_size: Number of pending loads which triggers fetching.
+        """
+        self._org_units = _BatchLoader(
+            partial(fetch_org_units_full, gql_client), max_batch_size
+        )
+        self._parents = _BatchLoader(partial(fetch_parents, gql_client), max_batch_size)
+
+    async def load(self, uuid: UUID) -> dict[str, Any]:
+        """Load everything required to recalculate an organisation unit.
+
+        Args:
+            uuid: UUID of the organisation unit to fetch.
+
+        Returns:
+            The GraphQL organisation unit object.
+        """
+        return await self._org_units.load(uuid)
+
+    async def load_parent(self, uuid: UUID) -> dict[str, Any]:
+        """Load the user-key and parent of an organisation unit.
+
+        Args:
+            uuid: UUID of the organisation unit to fetch.
+
+        Returns:
+            The GraphQL organisation unit object with user_key and parent_uuid.
+        """
+        return await self._parents.load(uuid)
+
+
 async def get_class_uuid(
     gql_client: PersistentGraphQLClient,
     class_uuid: Optional[UUID],
@@ -25,66 +25,19 @@ from ramodels.mo import OrganisationUnit
 from ramodels.mo import Validity
 from ramodels.mo._shared import OrgUnitHierarchy
 
-from orggatekeeper.calculate import fetch_org_unit
 from orggatekeeper.calculate import get_class_uuid
+from orggatekeeper.calculate import HideCache
 from orggatekeeper.calculate import is_line_management
+from orggatekeeper.calculate import is_ny_niveau
 from orggatekeeper.calculate import should_hide
 from orggatekeeper.calculate import update_line_management
 from orggatekeeper.config import get_settings
 from orggatekeeper.config import Settings
 from orggatekeeper.mo import fetch_class_uuid
+from orggatekeeper.mo import fetch_parents
 from tests import ORG_UUID
 
 
-async def test_fetch_org_unit() -> None:
-    """Test that fetch_org_unit can build an OrganisationUnit."""
-    uuid: UUID = UUID("08eaf849-e9f9-53e0-b6b9-3cd45763ecbb")
-    params: dict[str, Any] = {}
-
-    async def execute(*args: Any, **kwargs: Any) -> dict[str, Any]:
-        params["args"] = args
-        params["kwargs"] = kwargs
-
-        return {
-            "org_units": [
-                {
-                    "objects": [
-                        {
-                            "uuid": str(uuid),
-                            "user_key": "Viuf skole",
-                            "validity": {
-                                "from": "1960-01-01T00:00:00+01:00",
-                                "to": None,
-                            },
-                            "name": "Viuf skole",
-                            "parent_uuid": "2665d8e0-435b-5bb6-a550-f275692984ef",
-                            "org_unit_hierarchy_uuid": None,
-                            "org_unit_type_uuid": (
-                                "9d2ac723-d5e5-4e7f-9c7f-b207bd223bc2"
-                            ),
-                            "org_unit_level_uuid": (
-                                "d4c6fb4a-233f-4b85-a77a-6dcdb13ee0db"
-                            ),
-                        }
-                    ]
-                }
-            ]
-        }
-
-    session = MagicMock()
-    session.execute = execute
-    result = await fetch_org_unit(session, uuid)
-    assert len(params["args"]) == 2
-    assert isinstance(params["args"][0], DocumentNode)
-    assert params["args"][1] == {"uuids": [str(uuid)]}
-
-    assert isinstance(result, OrganisationUnit)
-    assert result.uuid == uuid
-
-
-# TODO: Test Cache of cached async methods
-
-
 async def test_fetch_class_uuid() -> None:
     """Test that fetch_org_unit_hierarchy_class can find our class uuid."""
     params: dict[str, Any] = {}
@@ -119,6 +72,27 @@ async def test_fetch_class_uuid() -> None:
         assert result == UUID(uuid)
 
 
+@pytest.mark.parametrize(
+    "unit_level_user_key,expected",
+    [
+        ("NY0-niveau", True),
+        ("NY9-niveau", True),
+        ("NY10-niveau", False),
+        ("NY-1-niveau", False),
+        ("NYA-niveau", False),
+        ("NY²-niveau", False),
+        ("NY1-niveaux", False),
+        ("XY1-niveau", False),
+        ("ny1-niveau", False),
+        ("Afdelings-niveau", False),
+        ("", False),
+    ],
+)
+def test_is_ny_niveau(unit_level_user_key: str, expected: bool) -> None:
+    """Test that is_ny_niveau matches NY{x}-niveau for single digits only."""
+    assert is_ny_niveau(unit_level_user_key) == expected
+
+
 @pytest.mark.parametrize(
     "org_unit_level_user_key,num_engagements,num_assocations,expected",
     [
@@ -141,52 +115,25 @@ async def test_fetch_class_uuid() -> None:
         ("Afdelings-niveau", 42, 42, True),
     ],
 )
-async def test_is_line_management(
+def test_is_line_management(
     org_unit_level_user_key: str,
     num_engagements: int,
     num_assocations: int,
     expected: bool,
 ) -> None:
     """Test that is_line_management works as expected."""
-    params: dict[str, Any] = {}
-
-    async def execute(*args: Any, **kwargs: Any) -> dict[str, Any]:
-        params["args"] = args
-        params["kwargs"] = kwargs
-
-        return {
-            "org_units": [
-                {
-                    "objects": [
-                        {
-                            "org_unit_level": {"user_key": org_unit_level_user_key},
-                            "engagements": [
-                                {"uuid": uuid4()} for _ in range(num_engagements)
-                            ],
-                            "associations": [
-                                {"uuid": uuid4()} for _ in range(num_assocations)
-                            ],
-                        }
-                    ]
-                }
-            ]
-        }
-
-    uuid = uuid4()
-    session = MagicMock()
-    session.execute = execute
-    result = await is_line_management(session, uuid)
-    assert len(params["args"]) == 2
-    assert isinstance(params["args"][0], DocumentNode)
-    assert params["args"][1] == {"uuids": [str(uuid)]}
-    assert result == expected
+    obj = {
+        "org_unit_level": {"user_key": org_unit_level_user_key},
+        "engagements": [{"uuid": uuid4()} for _ in range(num_engagements)],
+        "associations": [{"uuid": uuid4()} for _ in range(num_assocations)],
+    }
+    assert is_line_management(obj) == expected
 
 
 async def test_should_hide_no_list() -> None:
     """Test that calculate_hidden returns false when given empty list."""
-    uuid = uuid4()
-    session = MagicMock()
-    result = await should_hide(session, uuid, [])
+    org_unit_loader = MagicMock()
+    result = await should_hide(org_unit_loader, {"user_key": "AAAA"}, frozenset())
     assert result is False
 
 
@@ -215,43 +162,101 @@ async def test_should_hide_parent(
     uuid: UUID, hidden_list: list[str], expected: bool
 ) -> None:
     """Test that should_hide works as expected."""
-    parent_map = {
+    parent_map: dict[UUID, dict[str, Any]] = {
         UUID("0020f400-2777-4ef9-bfcb-5cdbb561d583"): {
+            "uuid": "0020f400-2777-4ef9-bfcb-5cdbb561d583",
             "user_key": "AAAA",
             "parent_uuid": None,
         },
         UUID("8b54ca22-66cb-4f46-94ae-ee0a0c370bcf"): {
+            "uuid": "8b54ca22-66cb-4f46-94ae-ee0a0c370bcf",
             "user_key": "AAAB",
-            "parent_uuid": UUID("0020f400-2777-4ef9-bfcb-5cdbb561d583"),
+            "parent_uuid": "0020f400-2777-4ef9-bfcb-5cdbb561d583",
         },
         UUID("f29d62b6-4aab-44e5-95e4-be602dceaf8b"): {
+            "uuid": "f29d62b6-4aab-44e5-95e4-be602dceaf8b",
             "user_key": "AAAC",
-            "parent_uuid": UUID("8b54ca22-66cb-4f46-94ae-ee0a0c370bcf"),
+            "parent_uuid": "8b54ca22-66cb-4f46-94ae-ee0a0c370bcf",
         },
         UUID("58fd9427-cde0-4740-b696-31690f21f831"): {
+            "uuid": "58fd9427-cde0-4740-b696-31690f21f831",
             "user_key": "AABA",
-            "parent_uuid": UUID("0020f400-2777-4ef9-bfcb-5cdbb561d583"),
+            "parent_uuid": "0020f400-2777-4ef9-bfcb-5cdbb561d583",
         },
     }
 
-    params: dict[str, Any] = {}
+    org_unit_loader = MagicMock()
+    org_unit_loader.load_parent = AsyncMock(side_effect=parent_map.__getitem__)
+    result = await should_hide(
+        org_unit_loader, parent_map[uuid], frozenset(hidden_list)
+    )
+    for args in org_unit_loader.load_parent.call_args_list:
+        assert isinstance(one(args.args), UUID)
+    assert result == expected
 
-    async def execute(*args: Any, **kwargs: Any) -> dict[str, Any]:
-        params["args"] = args
-        params["kwargs"] = kwargs
 
-        uuid = UUID(one(args[1]["uuids"]))
+async def test_should_hide_cache() -> None:
+    """Test that should_hide reuses decisions for shared ancestors."""
+    root = {"uuid": str(uuid4()), "user_key": "AAAA", "parent_uuid": None}
+    parent = {"uuid": str(uuid4()), "user_key": "AAAB", "parent_uuid": root["uuid"]}
+    child = {"uuid": str(uuid4()), "user_key": "AAAC", "parent_uuid": parent["uuid"]}
+    sibling = {"uuid": str(uuid4()), "user_key": "AABC", "parent_uuid": parent["uuid"]}
+    parent_map = {UUID(obj["uuid"]): obj for obj in [root, parent]}
+
+    org_unit_loader = MagicMock()
+    org_unit_loader.load_parent = AsyncMock(side_effect=parent_map.__getitem__)
+    hide_cache = HideCache(ttl=60)
+    hidden = frozenset({"AABA"})
+
+    assert await should_hide(org_unit_loader, child, hidden, hide_cache) is False
+    assert org_unit_loader.load_parent.await_count == 2
+    for obj in [root, parent, child]:
+        assert hide_cache.get(UUID(obj["uuid"])) is False
+
+    # The sibling shares its parent with the child, so no queries are needed
+    assert await should_hide(org_unit_loader, sibling, hidden, hide_cache) is False
+    assert org_unit_loader.load_parent.await_count == 2
+    assert hide_cache.get(UUID(sibling["uuid"])) is False
+
+
+def test_hide_cache_expiry() -> None:
+    """Test that HideCache forgets decisions once they expire."""
+    uuid = uuid4()
+    hide_cache = HideCache(ttl=60)
+    assert hide_cache.get(uuid) is None
+    hide_cache.set([uuid], True)
+    assert hide_cache.get(uuid) is True
+
+    hide_cache = HideCache(ttl=0)
+    hide_cache.set([uuid], True)
+    assert hide_cache.get(uuid) is None
+
 
-        return {"org_units": [{"objects": [parent_map[uuid]]}]}
+async def test_fetch_parents() -> None:
+    """Test that fetch_parents fetches a whole level in one query."""
+    uuids = [
+        UUID("8b54ca22-66cb-4f46-94ae-ee0a0c370bcf"),
+        UUID("58fd9427-cde0-4740-b696-31690f21f831"),
+    ]
+    objs = [
+        {
+            "uuid": str(uuid),
+            "user_key": user_key,
+            "parent_uuid": "0020f400-2777-4ef9-bfcb-5cdbb561d583",
+        }
+        for uuid, user_key in zip(uuids, ["AAAB", "AABA"])
+    ]
 
     session = MagicMock()
-    session.execute = execute
-    result = await should_hide(session, uuid, hidden_list)
-    assert len(params["args"]) == 2
-    assert isinstance(params["args"][0], DocumentNode)
-    assert isinstance(params["args"][1], dict)
-    UUID(params["args"][1]["uuids"][0])
-    assert result == expected
+    session.execute = AsyncMock(
+        return_value={"org_units": [{"objects": [obj]} for obj in objs]}
+    )
+    result = await fetch_parents(session, uuids)
+    session.execute.assert_awaited_once()
+    query, variables = session.execute.call_args.args
+    assert isinstance(query, DocumentNode)
+    assert variables == {"uuids": [str(uuid) for uuid in uuids]}
+    assert result == dict(zip(uuids, objs))
 
 
 @pytest.fixture()
@@ -271,6 +276,30 @@ def org_unit() -> Generator[OrganisationUnit, None, None]:
     )
 
 
+def org_unit_obj(org_unit: OrganisationUnit) -> dict[str, Any]:
+    """Construct the GraphQL object for an OrganisationUnit.
+
+    Args:
+        org_unit: The OrganisationUnit to convert.
+
+    Return:
+        GraphQL object as returned by fetch_org_units_full.
+    """
+    return {
+        "uuid": str(org_unit.uuid),
+        "user_key": org_unit.user_key,
+        "validity": {
+            "from": org_unit.validity.from_date.isoformat(),
+            "to": None,
+        },
+        "name": org_unit.name,
+        "parent_uuid": str(org_unit.parent.uuid) if org_unit.parent else None,
+        "org_unit_hierarchy_uuid": None,
+        "org_unit_type_uuid": str(org_unit.org_unit_type.uuid),
+        "org_unit_level_uuid": str(org_unit.org_unit_level.uuid),
+    }
+
+
 @pytest.fixture()
 def gql_client() -> Generator[MagicMock, None, None]:
     """Fixture to mock GraphQLClient."""
@@ -311,25 +340,42 @@ def class_uuid(
         yield hidden_uuid
 
 
+@pytest.fixture()
+def org_unit_loader() -> Generator[MagicMock, None, None]:
+    """Fixture to generate an OrgUnitLoader mock."""
+    org_unit_loader = MagicMock()
+    org_unit_loader.load = AsyncMock()
+    yield org_unit_loader
+
+
 @pytest.fixture()
 def seeded_update_line_management(
-    gql_client: MagicMock, model_client: AsyncMock, settings: Settings
+    gql_client: MagicMock,
+    model_client: AsyncMock,
+    settings: Settings,
+    org_unit_loader: MagicMock,
 ) -> Generator[Callable[[UUID], Awaitable[bool]], None, None]:
     """Fixture to generate update_line_management function."""
     seeded_update_line_management = partial(
-        update_line_management, gql_client, model_client, settings, ORG_UUID
+        update_line_management,
+        gql_client,
+        model_client,
+        settings,
+        ORG_UUID,
+        org_unit_loader,
     )
     yield seeded_update_line_management
 
 
+@patch("orggatekeeper.calculate.parse_org_unit")
 @patch("orggatekeeper.calculate.is_line_management")
 @patch("orggatekeeper.calculate.should_hide")
-@patch("orggatekeeper.calculate.fetch_org_unit")
 async def test_update_line_management_no_change(
-    fetch_org_unit: MagicMock,
     should_hide: MagicMock,
     is_line_management: MagicMock,
+    parse_org_unit: MagicMock,
     gql_client: MagicMock,
+    org_unit_loader: MagicMock,
     model_client: AsyncMock,
     seeded_update_line_management: Callable[[UUID], Awaitable[bool]],
     org_unit: OrganisationUnit,
@@ -337,24 +383,49 @@ async def test_update_line_management_no_change(
     """Test that update_line_management can do noop."""
     should_hide.return_value = False
     is_line_management.return_value = False
-    fetch_org_unit.return_value = org_unit
+    obj = org_unit_obj(org_unit)
+    org_unit_loader.load.return_value = obj
 
     uuid = org_unit.uuid
     result = await seeded_update_line_management(uuid)
     assert result is False
 
-    should_hide.assert_called_once_with(gql_client, uuid, [])
-    is_line_management.assert_called_once_with(gql_client, uuid)
-    fetch_org_unit.assert_called_once_with(gql_client, uuid)
+    should_hide.assert_called_once_with(org_unit_loader, obj, frozenset(), None)
+    is_line_management.assert_called_once_with(obj)
+    org_unit_loader.load.assert_awaited_once_with(uuid)
+    parse_org_unit.assert_not_called()
+    model_client.assert_not_called()
+
+
+@patch("orggatekeeper.calculate.parse_org_unit")
+@patch("orggatekeeper.calculate.is_line_management")
+async def test_update_line_management_already_line(
+    is_line_management: MagicMock,
+    parse_org_unit: MagicMock,
+    org_unit_loader: MagicMock,
+    model_client: AsyncMock,
+    class_uuid: UUID,
+    seeded_update_line_management: Callable[[UUID], Awaitable[bool]],
+    org_unit: OrganisationUnit,
+) -> None:
+    """Test that update_line_management does noop if already in line management."""
+    is_line_management.return_value = True
+    obj = org_unit_obj(org_unit)
+    obj["org_unit_hierarchy_uuid"] = str(class_uuid)
+    org_unit_loader.load.return_value = obj
+
+    result = await seeded_update_line_management(org_unit.uuid)
+    assert result is False
+
+    parse_org_unit.assert_not_called()
     model_client.assert_not_called()
 
 
 @patch("orggatekeeper.calculate.should_hide")
-@patch("orggatekeeper.calculate.fetch_org_unit")
 async def test_update_line_management_dry_run(
-    fetch_org_unit: MagicMock,
     should_hide: MagicMock,
     gql_client: MagicMock,
+    org_unit_loader: MagicMock,
     model_client: AsyncMock,
     set_settings: Callable[..., Settings],
     class_uuid: MagicMock,
@@ -363,29 +434,34 @@ async def test_update_line_management_dry_run(
     """Test that update_line_management can set hidden_uuid."""
     settings = set_settings(dry_run=True)
     seeded_update_line_management = partial(
-        update_line_management, gql_client, model_client, settings, ORG_UUID
+        update_line_management,
+        gql_client,
+        model_client,
+        settings,
+        ORG_UUID,
+        org_unit_loader,
     )
 
     should_hide.return_value = True
-    fetch_org_unit.return_value = org_unit
+    obj = org_unit_obj(org_unit)
+    org_unit_loader.load.return_value = obj
 
     uuid = org_unit.uuid
     result = await seeded_update_line_management(uuid)
     assert result is True
 
-    should_hide.assert_called_once_with(gql_client, uuid, [])
-    fetch_org_unit.assert_called_once_with(gql_client, uuid)
+    should_hide.assert_called_once_with(org_unit_loader, obj, frozenset(), None)
+    org_unit_loader.load.assert_awaited_once_with(uuid)
     model_client.edit.assert_not_called()
 
 
 @patch("orggatekeeper.calculate.datetime")
 @patch("orggatekeeper.calculate.should_hide")
-@patch("orggatekeeper.calculate.fetch_org_unit")
 async def test_update_line_management_hidden(
-    fetch_org_unit: MagicMock,
     should_hide: MagicMock,
     mock_datetime: MagicMock,
     gql_client: MagicMock,
+    org_unit_loader: MagicMock,
     model_client: AsyncMock,
     settings: Settings,
     class_uuid: UUID,
@@ -394,7 +470,8 @@ async def test_update_line_management_hidden(
 ) -> None:
     """Test that update_line_management can set hidden_uuid."""
     should_hide.return_value = True
-    fetch_org_unit.return_value = org_unit
+    obj = org_unit_obj(org_unit)
+    org_unit_loader.load.return_value = obj
 
     now = datetime.now()
     mock_datetime.datetime.now.return_value = now
@@ -403,8 +480,8 @@ async def test_update_line_management_hidden(
     result = await seeded_update_line_management(uuid)
     assert result is True
 
-    should_hide.assert_called_once_with(gql_client, uuid, [])
-    fetch_org_unit.assert_called_once_with(gql_client, uuid)
+    should_hide.assert_called_once_with(org_unit_loader, obj, frozenset(), None)
+    org_unit_loader.load.assert_awaited_once_with(uuid)
     assert model_client.mock_calls == [
         call.edit(
             [
@@ -422,13 +499,12 @@ async def test_update_line_management_hidden(
 @patch("orggatekeeper.calculate.datetime")
 @patch("orggatekeeper.calculate.is_line_management")
 @patch("orggatekeeper.calculate.should_hide")
-@patch("orggatekeeper.calculate.fetch_org_unit")
 async def test_update_line_management_line(
-    fetch_org_unit: MagicMock,
     should_hide: MagicMock,
     is_line_management: MagicMock,
     mock_datetime: MagicMock,
     gql_client: MagicMock,
+    org_unit_loader: MagicMock,
     model_client: AsyncMock,
     settings: Settings,
     class_uuid: UUID,
@@ -438,7 +514,8 @@ async def test_update_line_management_line(
     """Test that update_line_management can set line_management_uuid."""
     should_hide.return_value = False
     is_line_management.return_value = True
-    fetch_org_unit.return_value = org_unit
+    obj = org_unit_obj(org_unit)
+    org_unit_loader.load.return_value = obj
 
     now = datetime.now()
     mock_datetime.datetime.now.return_value = now
@@ -447,9 +524,9 @@ async def test_update_line_management_line(
     result = await seeded_update_line_management(uuid)
     assert result is True
 
-    should_hide.assert_called_once_with(gql_client, uuid, [])
-    is_line_management.assert_called_once_with(gql_client, uuid)
-    fetch_org_unit.assert_called_once_with(gql_client, uuid)
+    should_hide.assert_called_once_with(org_unit_loader, obj, frozenset(), None)
+    is_line_management.assert_called_once_with(obj)
+    org_unit_loader.load.assert_awaited_once_with(uuid)
     assert model_client.mock_calls == [
         call.edit(
             [
@@ -467,13 +544,12 @@ async def test_update_line_management_line(
 @patch("orggatekeeper.calculate.datetime")
 @patch("orggatekeeper.calculate.is_line_management")
 @patch("orggatekeeper.calculate.should_hide")
-@patch("orggatekeeper.calculate.fetch_org_unit")
 async def test_update_line_management_line_for_root_org_unit(
-    fetch_org_unit: MagicMock,
     should_hide: MagicMock,
     is_line_management: MagicMock,
     mock_datetime: MagicMock,
     gql_client: MagicMock,
+    org_unit_loader: MagicMock,
     model_client: AsyncMock,
     settings: Settings,
     class_uuid: UUID,
@@ -493,7 +569,8 @@ async def test_update_line_management_line_for_root_org_unit(
         parent_uuid=ORG_UUID,  # I.e. a root unit
         from_date=datetime.now(),
     )
-    fetch_org_unit.return_value = org_unit
+    obj = org_unit_obj(org_unit)
+    org_unit_loader.load.return_value = obj
 
     now = datetime.now()
     mock_datetime.datetime.now.return_value = now
@@ -502,9 +579,9 @@ async def test_update_line_management_line_for_root_org_unit(
     result = await seeded_update_line_management(uuid)
     assert result is True
 
-    should_hide.assert_called_once_with(gql_client, uuid, [])
-    is_line_management.assert_called_once_with(gql_client, uuid)
-    fetch_org_unit.assert_called_once_with(gql_client, uuid)
+    should_hide.assert_called_once_with(org_unit_loader, obj, frozenset(), None)
+    is_line_management.assert_called_once_with(obj)
+    org_unit_loader.load.assert_awaited_once_with(uuid)
     assert model_client.mock_calls == [
         call.edit(
             [
@@ -35,8 +35,10 @@ from orggatekeeper.config import get_settings
 from orggatekeeper.main import build_information
 from orggatekeeper.main import construct_clients
 from orggatekeeper.main import create_app
+from orggatekeeper.main import deduplicate_concurrent
 from orggatekeeper.main import gather_with_concurrency
 from orggatekeeper.main import organisation_gatekeeper_callback
+from orggatekeeper.main import seed_class_uuids
 from orggatekeeper.main import update_build_information
 from orggatekeeper.main import update_counter
 from tests import ORG_UUID
@@ -176,6 +178,101 @@ async def test_gather_with_concurrency() -> None:
     assert duration > 0.3
 
 
+async def test_deduplicate_concurrent_queued() -> None:
+    """Test that concurrent calls join a call which has yet to start."""
+    func = AsyncMock(return_value=True)
+    deduplicated = deduplicate_concurrent(func)
+
+    uuid = uuid4()
+    other_uuid = uuid4()
+    results = await asyncio.gather(
+        deduplicated(uuid), deduplicated(uuid), deduplicated(other_uuid)
+    )
+    assert results == [True, True, True]
+    assert func.mock_calls == [call(uuid), call(other_uuid)]
+
+    # Separately deduplicated functions do not share calls
+    other_func = AsyncMock(return_value=False)
+    assert await asyncio.gather(
+        deduplicated(uuid), deduplicate_concurrent(other_func)(uuid)
+    ) == [True, False]
+    assert func.await_count == 3
+    other_func.assert_awaited_once_with(uuid)
+
+
+async def test_deduplicate_concurrent_reruns_after_running() -> None:
+    """Test that calls during a running call trigger one follow-up run."""
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def recalculate(_: UUID) -> bool:
+        started.set()
+        await release.wait()
+        return True
+
+    func = AsyncMock(side_effect=recalculate)
+    deduplicated = deduplicate_concurrent(func)
+
+    uuid = uuid4()
+    first = asyncio.ensure_future(deduplicated(uuid))
+    await started.wait()
+    assert func.await_count == 1
+
+    # Both calls arrive after the first run has read its data
+    followups = [asyncio.ensure_future(deduplicated(uuid)) for _ in range(2)]
+    await asyncio.sleep(0)
+    assert func.await_count == 1
+
+    release.set()
+    assert await asyncio.gather(first, *followups) == [True, True, True]
+    assert func.await_count == 2
+
+
+@pytest.mark.parametrize(
+    "enable_hide_logic,hidden,resolve_hidden",
+    [
+        (True, frozenset({"AAAA"}), True),
+        (True, frozenset(), False),
+        (False, frozenset({"AAAA"}), False),
+    ],
+)
+@patch("orggatekeeper.main.get_class_uuid")
+async def test_seed_class_uuids(
+    get_class_uuid: AsyncMock,
+    enable_hide_logic: bool,
+    hidden: frozenset[str],
+    resolve_hidden: bool,
+) -> None:
+    """Test that seed_class_uuids resolves the required class UUIDs."""
+    line_management_uuid = uuid4()
+    hidden_uuid = uuid4()
+
+    async def resolve(_: Any, _class_uuid: UUID | None, class_user_key: str) -> UUID:
+        return {"linjeorg": line_management_uuid, "hide": hidden_uuid}[class_user_key]
+
+    get_class_uuid.side_effect = resolve
+
+    get_settings.cache_clear()
+    settings = get_settings(
+        client_secret="hunter2", enable_hide_logic=enable_hide_logic, hidden=hidden
+    )
+    gql_client = MagicMock()
+    seeded_settings = await seed_class_uuids(gql_client, settings)
+
+    assert seeded_settings.line_management_uuid == line_management_uuid
+    if resolve_hidden:
+        assert seeded_settings.hidden_uuid == hidden_uuid
+        assert get_class_uuid.mock_calls == [
+            call(gql_client, None, "linjeorg"),
+            call(gql_client, None, "hide"),
+        ]
+    else:
+        assert seeded_settings.hidden_uuid is None
+        assert get_class_uuid.mock_calls == [call(gql_client, None, "linjeorg")]
+    # The cached settings object is left untouched
+    assert settings.line_management_uuid is None
+
+
 @pytest.fixture
 def fastapi_app_builder() -> Generator[Callable[..., FastAPI], None, None]:
     """Fixture for the FastAPI app builder."""
@@ -277,10 +374,14 @@ async def test_trigger_uuid_endpoint(
     ]
 
 
+@patch("orggatekeeper.main.get_class_uuid")
 @patch("orggatekeeper.main.fetch_org_uuid")
 @patch("orggatekeeper.main.MOAMQPSystem")
 async def test_lifespan(
-    mo_amqpsystem: MOAMQPSystem, mock_fetch_org_uuid: MagicMock, fastapi_app: FastAPI
+    mo_amqpsystem: MOAMQPSystem,
+    mock_fetch_org_uuid: MagicMock,
+    mock_get_class_uuid: MagicMock,
+    fastapi_app: FastAPI,
 ) -> None:
     """Test that our lifespan events are handled as expected."""
     amqp_system = MagicMock()
@@ -289,6 +390,7 @@ async def test_lifespan(
 
     mo_amqpsystem.return_value = amqp_system
     mock_fetch_org_uuid.return_value = ORG_UUID
+    mock_get_class_uuid.return_value = uuid4()
 
     assert not amqp_system.mock_calls
 
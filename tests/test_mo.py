@@ -2,10 +2,19 @@
 #
 # SPDX-License-Identifier: MPL-2.0
 """Test the mo.py module"""
+import asyncio
 from typing import Any
+from unittest.mock import AsyncMock
 from unittest.mock import MagicMock
+from uuid import UUID
+from uuid import uuid4
 
+import pytest
+
+from orggatekeeper.mo import fetch_org_units_full
 from orggatekeeper.mo import fetch_org_uuid
+from orggatekeeper.mo import OrgUnitLoader
+from orggatekeeper.mo import PARENT_QUERY
 from tests import ORG_UUID
 
 
@@ -27,5 +36,146 @@ async def test_fetch_org_uuid() -> None:
     assert ORG_UUID == uuid
 
 
+async def test_fetch_org_units_full() -> None:
+    """Test that fetch_org_units_full leaves out units without exactly one object."""
+    uuids = [uuid4(), uuid4(), uuid4()]
+    gql_client = AsyncMock()
+    gql_client.execute.return_value = {
+        "org_units": [
+            {"objects": [{"uuid": str(uuids[0])}]},
+            {"objects": [{"uuid": str(uuids[1])}, {"uuid": str(uuids[1])}]},
+        ]
+    }
+
+    result = await fetch_org_units_full(gql_client, uuids)
+    assert result == {uuids[0]: {"uuid": str(uuids[0])}}
+
+    gql_client.execute.assert_awaited_once()
+    variables = gql_client.execute.call_args.args[1]
+    assert variables == {"uuids": [str(uuid) for uuid in uuids]}
+
+
+def org_units_gql_client(execute: Any = None) -> AsyncMock:
+    """Construct a GraphQL client returning an object for every UUID queried.
+
+    Args:
+        execute: Coroutine to await before every result, if any.
+
+    Returns:
+        The GraphQL client mock.
+    """
+
+    async def side_effect(_: Any, variables: dict[str, Any]) -> dict[str, Any]:
+        if execute is not None:
+            await execute()
+        uuids = variables["uuids"]
+        return {"org_units": [{"objects": [{"uuid": uuid}]} for uuid in uuids]}
+
+    gql_client = AsyncMock()
+    gql_client.execute.side_effect = side_effect
+    return gql_client
+
+
+def queried_uuids(gql_client: AsyncMock) -> list[list[UUID]]:
+    """List the UUIDs queried by each call to the GraphQL client.
+
+    Args:
+        gql_client: The GraphQL client mock.
+
+    Returns:
+        The UUIDs of every query.
+    """
+    return [
+        list(map(UUID, call.args[1]["uuids"]))
+        for call in gql_client.execute.call_args_list
+    ]
+
+
+async def test_org_unit_loader_batches_same_iteration() -> None:
+    """Test that loads made together are fetched using a single query."""
+    gql_client = org_units_gql_client()
+    loader = OrgUnitLoader(gql_client, max_batch_size=10)
+
+    uuids = [uuid4(), uuid4()]
+    results = await asyncio.gather(
+        loader.load(uuids[0]), loader.load(uuids[1]), loader.load(uuids[0])
+    )
+    assert results == [{"uuid": str(uuid)} for uuid in [uuids[0], uuids[1], uuids[0]]]
+    assert queried_uuids(gql_client) == [uuids]
+
+    # Nothing else is going on, so a lone load is fetched straight away
+    uuid = uuid4()
+    assert await asyncio.wait_for(loader.load(uuid), 1) == {"uuid": str(uuid)}
+    assert queried_uuids(gql_client) == [uuids, [uuid]]
+
+
+async def test_org_unit_loader_batches_while_fetching() -> None:
+    """Test that loads made during a fetch are fetched together afterwards."""
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def execute() -> None:
+        started.set()
+        await release.wait()
+
+    gql_client = org_units_gql_client(execute)
+    loader = OrgUnitLoader(gql_client, max_batch_size=10)
+
+    uuids = [uuid4(), uuid4(), uuid4()]
+    first = asyncio.ensure_future(loader.load(uuids[0]))
+    await started.wait()
+    rest = [asyncio.ensure_future(loader.load(uuid)) for uuid in uuids[1:]]
+    await asyncio.sleep(0)
+    assert queried_uuids(gql_client) == [uuids[:1]]
+
+    release.set()
+    results = await asyncio.gather(first, *rest)
+    assert results == [{"uuid": str(uuid)} for uuid in uuids]
+    assert queried_uuids(gql_client) == [uuids[:1], uuids[1:]]
+
+
+async def test_org_unit_loader_max_batch_size() -> None:
+    """Test that a full batch is fetched without waiting for more loads."""
+    gql_client = org_units_gql_client()
+    loader = OrgUnitLoader(gql_client, max_batch_size=2)
+
+    uuids = [uuid4(), uuid4(), uuid4()]
+    await asyncio.gather(*map(loader.load, uuids))
+    assert queried_uuids(gql_client) == [uuids[:2], uuids[2:]]
+
+
+async def test_org_unit_loader_errors() -> None:
+    """Test that failures are passed on to the waiting loads."""
+    uuid = uuid4()
+    missing_uuid = uuid4()
+    gql_client = AsyncMock()
+    gql_client.execute.return_value = {
+        "org_units": [{"objects": [{"uuid": str(uuid)}]}]
+    }
+    loader = OrgUnitLoader(gql_client, max_batch_size=10)
+
+    results = await asyncio.gather(
+        loader.load(uuid), loader.load(missing_uuid), return_exceptions=True
+    )
+    assert results[0] == {"uuid": str(uuid)}
+    assert isinstance(results[1], ValueError)
+
+    gql_client.execute.side_effect = ValueError("BOOM")
+    with pytest.raises(ValueError, match="BOOM"):
+        await loader.load(uuid)
+
+
+async def test_org_unit_loader_load_parent() -> None:
+    """Test that parents are loaded separately using the parent query."""
+    gql_client = org_units_gql_client()
+    loader = OrgUnitLoader(gql_client, max_batch_size=10)
+
+    uuid = uuid4()
+    parent_uuid = uuid4()
+    await asyncio.gather(loader.load(uuid), loader.load_parent(parent_uuid))
+    assert queried_uuids(gql_client) == [[uuid], [parent_uuid]]
+    assert gql_client.execute.call_args_list[1].args[0] is PARENT_QUERY
+
+
 # TODO: move the rest of the "fetch" tests from test_calculate.py to this module
 # (will be done shortly in a separate MR)
@@ -44,3 +44,15 @@ def test_graphql_timeout_non_default() -> None:
     get_settings.cache_clear()
     settings = get_settings(client_secret="not important", graphql_timeout=10)
     assert 10 == settings.graphql_timeout
+
+
+def test_hidden_frozenset(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that hidden user-keys are parsed into a frozenset."""
+    get_settings.cache_clear()
+    settings = get_settings(client_secret="not important")
+    assert settings.hidden == frozenset()
+
+    get_settings.cache_clear()
+    monkeypatch.setenv("HIDDEN", '["AAAA", "AAAB", "AAAA"]')
+    settings = get_settings(client_secret="not important")
+    assert settings.hidden == frozenset({"AAAA", "AAAB"})